@@ -6,10 +6,15 @@ Streamlit-based interactive dashboard with user authentication and dataset uploa
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
+import html
+import io
 import requests
+from requests.adapters import HTTPAdapter
+from http.cookiejar import DefaultCookiePolicy
 import os
+import sys
+import time
 from pathlib import Path
 from datetime import datetime
 
@@ -28,10 +33,50 @@ DATA_PATH = Path(os.getenv("DATA_PATH", PROJECT_ROOT / "data" / "processed"))
 API_URL = os.getenv("API_URL", "http://localhost:8000")
 
 # File paths
-PREDICTIONS_FILE = DATA_PATH / "customer_predictions.csv"
+PREDICTIONS_FILE = DATA_PATH / "customer_predictions.parquet"
+PREDICTIONS_CSV_FILE = DATA_PATH / "customer_predictions.csv"
 RETENTION_FILE = DATA_PATH / "retention_actions.csv"
 MODEL_COMPARISON_FILE = DATA_PATH / "model_comparison.csv"
 
+# Backend endpoints: name -> (method, full URL, requires auth)
+API_ENDPOINTS = {
+    "register": ("POST", f"{API_URL}/auth/register", False),
+    "login": ("POST", f"{API_URL}/auth/login-json", False),
+    "me": ("GET", f"{API_URL}/auth/me", True),
+    "upload": ("POST", f"{API_URL}/datasets/upload", True),
+    "history": ("GET", f"{API_URL}/datasets/history", True),
+    "compare": ("POST", f"{API_URL}/datasets/compare", True),
+    "compare_latest": ("GET", f"{API_URL}/datasets/compare/latest", True),
+}
+
+# Columns the dashboard actually reads from the predictions file
+PREDICTION_COLUMNS = ["Churn_Probability", "MonthlyCharges", "Contract"]
+PREDICTION_DTYPES = {"Churn_Probability": "float32", "MonthlyCharges": "float32", "Contract": "category"}
+
+# Upload preview: rows shown, and chunk size used when counting rows
+UPLOAD_PREVIEW_ROWS = 10
+UPLOAD_CHUNK_ROWS = 100_000
+
+# Cached Plotly figures kept per chart builder, so upload-keyed charts cannot grow without bound
+FIGURE_CACHE_ENTRIES = 32
+
+# Seconds a session reuses its dataset history; picks up uploads made from other tabs or devices
+HISTORY_TTL = 300
+
+# Low-cardinality text columns in uploaded CSVs, stored as categories in the preview
+UPLOAD_DTYPES = {
+    col: "category"
+    for col in ["Gender", "Partner", "Dependents", "PhoneService", "InternetService",
+                "Contract", "PaperlessBilling", "PaymentMethod"]
+}
+
+# Risk level lower bounds (each level includes its bound, matching the >= KPI thresholds)
+RISK_BINS = np.array([0.3, 0.5, 0.7], dtype=np.float32)
+RISK_LABELS = ['Low', 'Medium', 'High', 'Critical']
+
+# Risk/value quadrants, indexed by (high_risk << 1) | high_value
+SEGMENT_LABELS = ['Low Risk, Low Value', 'Low Risk, High Value', 'High Risk, Low Value', 'High Risk, High Value']
+
 # Page Configuration
 st.set_page_config(
     page_title="Customer Churn Prediction",
@@ -63,6 +108,15 @@ st.markdown("""
         background: #f8f9fa;
         border-radius: 10px;
     }
+    .kpi-grid { display: flex; gap: 1rem; margin-bottom: 1rem; }
+    .kpi-card {
+        flex: 1;
+        padding: 0.75rem 1rem;
+        background: rgba(128, 128, 128, 0.08);
+        border-radius: 10px;
+    }
+    .kpi-label { font-size: 0.875rem; opacity: 0.7; }
+    .kpi-value { font-size: 1.75rem; font-weight: 600; }
 </style>
 """, unsafe_allow_html=True)
 
@@ -75,53 +129,70 @@ if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
 if 'token' not in st.session_state:
     st.session_state.token = None
+if 'auth_header' not in st.session_state:
+    st.session_state.auth_header = {}
 if 'user' not in st.session_state:
     st.session_state.user = None
 if 'current_analysis' not in st.session_state:
     st.session_state.current_analysis = None
+if 'history_version' not in st.session_state:
+    st.session_state.history_version = 0
 
 
 # ============================================================================
 # API HELPER FUNCTIONS
 # ============================================================================
 
-def api_request(method, endpoint, data=None, files=None, auth=True):
-    """Make API request with optional authentication"""
-    headers = {}
-    if auth and st.session_state.token:
-        headers["Authorization"] = f"Bearer {st.session_state.token}"
-    
-    url = f"{API_URL}{endpoint}"
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so API calls reuse pooled keep-alive connections"""
+    session = requests.Session()
+    # The session is shared by every user, so never let it carry cookies
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def set_token(token):
+    """Store the access token along with its prebuilt Authorization header"""
+    st.session_state.token = token
+    st.session_state.auth_header = {"Authorization": f"Bearer {token}"} if token else {}
+    # Anything cached for the previous token belongs to another login (logout, expiry or a new user)
+    st.session_state.pop("upload_preview", None)
+    st.session_state.pop("history_view", None)
+    st.session_state.pop("dataset_history", None)
+
+
+def api_request(endpoint, data=None, files=None, params=None):
+    """Make API request to a named endpoint from API_ENDPOINTS"""
+    method, url, auth = API_ENDPOINTS[endpoint]
+    headers = st.session_state.auth_header if auth else {}
+    session = get_http_session()
     
     try:
-        if method == "GET":
-            response = requests.get(url, headers=headers, timeout=30)
-        elif method == "POST":
-            if files:
-                response = requests.post(url, headers=headers, files=files, data=data, timeout=60)
-            else:
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers, timeout=30)
+        if files:
+            response = session.request(method, url, headers=headers, files=files, data=data, params=params, timeout=60)
         else:
-            return None
+            response = session.request(method, url, headers=headers, json=data, params=params, timeout=30)
         
         if response.status_code in [200, 201]:
             return response.json()
         elif response.status_code == 401:
             st.session_state.authenticated = False
-            st.session_state.token = None
+            set_token(None)
             return {"error": "Unauthorized. Please login again."}
         else:
             # Try to get error detail, but handle non-JSON responses
             try:
                 error_detail = response.json().get("detail", "Unknown error")
-            except:
+            except ValueError:
                 error_detail = response.text or f"HTTP {response.status_code}"
             return {"error": error_detail}
     except requests.exceptions.ConnectionError:
         return {"error": "Cannot connect to API. Make sure the backend is running."}
-    except Exception as e:
+    except (requests.RequestException, ValueError) as e:
         return {"error": str(e)}
 
 
@@ -134,19 +205,19 @@ def register_user(email, username, password, full_name=None, company=None):
         "full_name": full_name,
         "company": company
     }
-    return api_request("POST", "/auth/register", data, auth=False)
+    return api_request("register", data)
 
 
 def login_user(email, password):
     """Login user and get token"""
     data = {"email": email, "password": password}
-    result = api_request("POST", "/auth/login-json", data, auth=False)
+    result = api_request("login", data)
     
     if result and "access_token" in result:
-        st.session_state.token = result["access_token"]
+        set_token(result["access_token"])
         st.session_state.authenticated = True
         # Get user info
-        user_info = api_request("GET", "/auth/me")
+        user_info = api_request("me")
         if user_info and "error" not in user_info:
             st.session_state.user = user_info
         return True
@@ -156,32 +227,46 @@ def login_user(email, password):
 def logout_user():
     """Logout current user"""
     st.session_state.authenticated = False
-    st.session_state.token = None
+    set_token(None)
     st.session_state.user = None
     st.session_state.current_analysis = None
 
 
 def upload_dataset(file, description=None):
     """Upload dataset for analysis"""
-    files = {"file": (file.name, file, "text/csv")}
+    files = {"file": (file.name, file.getvalue(), "text/csv")}
     data = {"description": description} if description else {}
-    return api_request("POST", "/datasets/upload", data=data, files=files)
+    return api_request("upload", data=data, files=files)
 
 
 def get_dataset_history(limit=10):
     """Get user's dataset upload history"""
-    return api_request("GET", f"/datasets/history?limit={limit}")
+    return api_request("history", params={"limit": limit})
 
 
 def compare_latest_datasets():
     """Compare the latest two datasets"""
-    return api_request("GET", "/datasets/compare/latest")
+    return api_request("compare_latest")
 
 
 def compare_datasets(dataset_1_id, dataset_2_id):
     """Compare two specific datasets"""
     data = {"dataset_1_id": dataset_1_id, "dataset_2_id": dataset_2_id}
-    return api_request("POST", "/datasets/compare", data)
+    return api_request("compare", data)
+
+
+# ============================================================================
+# UI HELPERS
+# ============================================================================
+
+def kpi_grid(items):
+    """Render (label, value) KPI cards as a single HTML block"""
+    cards = "".join(
+        f'<div class="kpi-card"><div class="kpi-label">{html.escape(label)}</div>'
+        f'<div class="kpi-value">{html.escape(value).replace("$", "&#36;")}</div></div>'
+        for label, value in items
+    )
+    st.markdown(f'<div class="kpi-grid">{cards}</div>', unsafe_allow_html=True)
 
 
 # ============================================================================
@@ -248,6 +333,25 @@ def show_auth_page():
 # PAGE: UPLOAD DATASET
 # ============================================================================
 
+def get_upload_preview(uploaded_file):
+    """Return (first rows, row count, column count) for an uploaded CSV, computed once per file"""
+    cached = st.session_state.get("upload_preview")
+    if cached is None or cached[0] != uploaded_file.file_id:
+        # Parse from a private in-memory buffer so the uploaded file's cursor is never moved
+        buf = io.BytesIO(uploaded_file.getvalue())
+        preview = pd.read_csv(buf, nrows=UPLOAD_PREVIEW_ROWS, dtype_backend="pyarrow")
+        preview = preview.astype({col: dtype for col, dtype in UPLOAD_DTYPES.items() if col in preview.columns})
+        # Count rows in bounded chunks of a single column so the parsed frame stays small
+        buf.seek(0)
+        n_rows = sum(
+            len(chunk)
+            for chunk in pd.read_csv(buf, usecols=[0], chunksize=UPLOAD_CHUNK_ROWS)
+        )
+        cached = (uploaded_file.file_id, preview, n_rows, len(preview.columns))
+        st.session_state.upload_preview = cached
+    return cached[1:]
+
+
 def show_upload_page():
     """Show dataset upload and analysis page"""
     st.markdown('<h1 class="main-header">📤 Upload Your Dataset</h1>', unsafe_allow_html=True)
@@ -295,12 +399,9 @@ def show_upload_page():
         # Preview uploaded file
         st.markdown("### 📋 Data Preview")
         try:
-            df_preview = pd.read_csv(uploaded_file)
-            st.dataframe(df_preview.head(10), use_container_width=True)
-            st.info(f"📊 Total rows: {len(df_preview):,} | Columns: {len(df_preview.columns)}")
-            
-            # Reset file pointer for upload
-            uploaded_file.seek(0)
+            df_preview, n_rows, n_cols = get_upload_preview(uploaded_file)
+            st.dataframe(df_preview, use_container_width=True)
+            st.info(f"📊 Total rows: {n_rows:,} | Columns: {n_cols}")
             
             if st.button("🚀 Analyze Dataset", type="primary", use_container_width=True):
                 with st.spinner("Analyzing dataset..."):
@@ -308,14 +409,17 @@ def show_upload_page():
                 
                 if result and "error" not in result:
                     st.session_state.current_analysis = result
+                    st.session_state.history_version += 1
                     st.success("✅ Dataset analyzed successfully!")
                     st.rerun()
                 elif result and "error" in result:
                     st.error(f"❌ Error: {result['error']}")
                 else:
                     st.error("❌ Failed to analyze dataset")
-        except Exception as e:
+        except ValueError as e:  # ParserError, EmptyDataError and UnicodeDecodeError all subclass it
             st.error(f"❌ Error reading file: {e}")
+    else:
+        st.session_state.pop("upload_preview", None)
     
     # Show Current Analysis Results
     if st.session_state.current_analysis:
@@ -325,16 +429,12 @@ def show_upload_page():
         st.markdown("### 📊 Analysis Results")
         
         # KPI Cards
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("Total Customers", f"{analysis.get('total_customers', 0):,}")
-        with col2:
-            st.metric("Churn Rate", f"{analysis.get('churn_rate', 0):.1f}%")
-        with col3:
-            st.metric("High Risk", f"{analysis.get('high_risk_count', 0):,}")
-        with col4:
-            st.metric("Revenue at Risk", f"${analysis.get('revenue_at_risk', 0):,.0f}")
+        kpi_grid([
+            ("Total Customers", f"{analysis.get('total_customers', 0):,}"),
+            ("Churn Rate", f"{analysis.get('churn_rate', 0):.1f}%"),
+            ("High Risk", f"{analysis.get('high_risk_count', 0):,}"),
+            ("Revenue at Risk", f"${analysis.get('revenue_at_risk', 0):,.0f}"),
+        ])
         
         # Risk Distribution
         col1, col2 = st.columns(2)
@@ -343,19 +443,9 @@ def show_upload_page():
             st.subheader("🎯 Risk Distribution")
             segment_stats = analysis.get('segment_stats', {})
             if segment_stats:
-                risk_data = pd.DataFrame([
-                    {"Risk Level": level, "Count": stats.get('count', 0)}
-                    for level, stats in segment_stats.items()
-                ])
-                fig = px.pie(
-                    risk_data, values='Count', names='Risk Level',
-                    color='Risk Level',
-                    color_discrete_map={
-                        'Low': '#2ecc71', 'Medium': '#f1c40f',
-                        'High': '#f39c12', 'Critical': '#e74c3c'
-                    },
-                    hole=0.4
-                )
+                levels = tuple(segment_stats)
+                counts = tuple(segment_stats[level].get('count', 0) for level in levels)
+                fig = make_risk_pie(levels, counts)
                 st.plotly_chart(fig, use_container_width=True)
         
         with col2:
@@ -379,25 +469,55 @@ def show_upload_page():
 # PAGE: HISTORY & COMPARISON
 # ============================================================================
 
+def build_history_view(history):
+    """Build the formatted history table and the compare picker options from dataset records"""
+    history_df = pd.DataFrame(history)
+    history_df['upload_date'] = pd.to_datetime(history_df['upload_date']).dt.strftime('%Y-%m-%d %H:%M')
+    table = history_df[['filename', 'upload_date', 'total_customers', 'churn_rate', 'revenue_at_risk']]
+    dataset_options = {f"{d['filename']} ({d['upload_date'][:10]})": d['id'] for d in history}
+    return table, dataset_options
+
+
+def get_cached_history():
+    """Per-session dataset history, refetched after a new upload or once it is HISTORY_TTL seconds old"""
+    version = st.session_state.history_version
+    cached = st.session_state.get("dataset_history")
+    if cached is None or cached[0] != version or time.monotonic() - cached[1] > HISTORY_TTL:
+        history = get_dataset_history(limit=20)
+        if not history or "error" in history:
+            return history
+        cached = (version, time.monotonic(), history)
+        st.session_state.dataset_history = cached
+    return cached[2]
+
+
+def get_history_view(history):
+    """Per-session history view, rebuilt only when the set of uploaded datasets changes"""
+    fingerprint = tuple((d['id'], d['upload_date']) for d in history)
+    cached = st.session_state.get("history_view")
+    if cached is None or cached[0] != fingerprint:
+        cached = (fingerprint, *build_history_view(history))
+        st.session_state.history_view = cached
+    return cached[1:]
+
+
 def show_comparison_page():
     """Show dataset history and comparison"""
     st.markdown('<h1 class="main-header">📈 Dataset History & Comparison</h1>', unsafe_allow_html=True)
     
     # Get history
-    history = get_dataset_history(limit=20)
+    history = get_cached_history()
     
     if not history or "error" in history:
         st.info("📭 No datasets uploaded yet. Upload your first dataset to get started!")
         return
     
     st.markdown("### 📜 Your Dataset History")
+    history_table, dataset_options = get_history_view(history)
     
     # History table
-    history_df = pd.DataFrame(history)
-    history_df['upload_date'] = pd.to_datetime(history_df['upload_date']).dt.strftime('%Y-%m-%d %H:%M')
-    
     st.dataframe(
-        history_df[['filename', 'upload_date', 'total_customers', 'churn_rate', 'revenue_at_risk']],
+        history_table,
         use_container_width=True,
         hide_index=True,
         column_config={
@@ -413,61 +533,76 @@ def show_comparison_page():
     
     # Comparison Section
     if len(history) >= 2:
-        st.markdown("### 🔄 Compare Datasets")
-        
-        col1, col2 = st.columns(2)
-        
-        dataset_options = {f"{d['filename']} ({d['upload_date'][:10]})": d['id'] for d in history}
-        
-        with col1:
-            st.markdown("**Previous Dataset (Baseline)**")
-            prev_selection = st.selectbox(
-                "Select previous dataset",
-                options=list(dataset_options.keys()),
-                index=1 if len(history) > 1 else 0,
-                key="prev_dataset"
-            )
-        
-        with col2:
-            st.markdown("**Current Dataset**")
-            curr_selection = st.selectbox(
-                "Select current dataset",
-                options=list(dataset_options.keys()),
-                index=0,
-                key="curr_dataset"
-            )
-        
-        if st.button("📊 Compare Datasets", type="primary", use_container_width=True):
-            prev_id = dataset_options[prev_selection]
-            curr_id = dataset_options[curr_selection]
-            
-            if prev_id == curr_id:
-                st.warning("Please select different datasets to compare")
-            else:
-                with st.spinner("Comparing datasets..."):
-                    comparison = compare_datasets(prev_id, curr_id)
-                
-                if comparison and "error" not in comparison:
-                    show_comparison_results(comparison)
-                else:
-                    st.error("Failed to compare datasets")
-        
-        # Auto-compare with latest
-        st.markdown("---")
-        st.markdown("### ⚡ Quick Comparison (Latest vs Previous)")
+        show_comparison_selector(dataset_options)
+    else:
+        st.info("📊 Upload at least 2 datasets to enable comparison features")
+
+
+@st.fragment
+def show_comparison_selector(dataset_options):
+    """Dataset pickers and compare buttons; reruns on its own without refetching history"""
+    st.markdown("### 🔄 Compare Datasets")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Previous Dataset (Baseline)**")
+        prev_selection = st.selectbox(
+            "Select previous dataset",
+            options=list(dataset_options.keys()),
+            index=1 if len(dataset_options) > 1 else 0,
+            key="prev_dataset"
+        )
+    
+    with col2:
+        st.markdown("**Current Dataset**")
+        curr_selection = st.selectbox(
+            "Select current dataset",
+            options=list(dataset_options.keys()),
+            index=0,
+            key="curr_dataset"
+        )
+    
+    if st.button("📊 Compare Datasets", type="primary", use_container_width=True):
+        prev_id = dataset_options[prev_selection]
+        curr_id = dataset_options[curr_selection]
         
-        if st.button("Compare Latest Upload with Previous", use_container_width=True):
-            with st.spinner("Comparing..."):
-                comparison = compare_latest_datasets()
+        if prev_id == curr_id:
+            st.warning("Please select different datasets to compare")
+        else:
+            with st.spinner("Comparing datasets..."):
+                comparison = compare_datasets(prev_id, curr_id)
             
             if comparison and "error" not in comparison:
                 show_comparison_results(comparison)
-            elif comparison is None:
-                st.info("Need at least 2 datasets to compare")
             else:
                 st.error("Failed to compare datasets")
-    else:
-        st.info("📊 Upload at least 2 datasets to enable comparison features")
+    
+    # Auto-compare with latest
+    st.markdown("---")
+    st.markdown("### ⚡ Quick Comparison (Latest vs Previous)")
+    
+    if st.button("Compare Latest Upload with Previous", use_container_width=True):
+        with st.spinner("Comparing..."):
+            comparison = compare_latest_datasets()
+        
+        if comparison and "error" not in comparison:
+            show_comparison_results(comparison)
+        elif comparison is None:
+            st.info("Need at least 2 datasets to compare")
+        else:
+            st.error("Failed to compare datasets")
+
+
+def period_summary(period):
+    """Markdown bullet list for one side of a detailed comparison"""
+    # Dollar signs are escaped so two amounts in one block are not read as LaTeX
+    return (
+        f"- Customers: {period.get('customers', 0):,}\n"
+        f"- Revenue: \\${period.get('revenue', 0):,.0f}\n"
+        f"- Churn Rate: {period.get('churn_rate', 0):.1f}%\n"
+        f"- At Risk: \\${period.get('revenue_at_risk', 0):,.0f}"
+    )
 
 
 def show_comparison_results(comparison):
@@ -523,19 +658,11 @@ def show_comparison_results(comparison):
         
         with col1:
             st.markdown(f"**📅 {comparison.get('dataset_1_filename', 'Previous')}**")
-            period_1 = detailed.get('period_1', {})
-            st.write(f"- Customers: {period_1.get('customers', 0):,}")
-            st.write(f"- Revenue: ${period_1.get('revenue', 0):,.0f}")
-            st.write(f"- Churn Rate: {period_1.get('churn_rate', 0):.1f}%")
-            st.write(f"- At Risk: ${period_1.get('revenue_at_risk', 0):,.0f}")
+            st.markdown(period_summary(detailed.get('period_1', {})))
         
         with col2:
             st.markdown(f"**📅 {comparison.get('dataset_2_filename', 'Current')}**")
-            period_2 = detailed.get('period_2', {})
-            st.write(f"- Customers: {period_2.get('customers', 0):,}")
-            st.write(f"- Revenue: ${period_2.get('revenue', 0):,.0f}")
-            st.write(f"- Churn Rate: {period_2.get('churn_rate', 0):.1f}%")
-            st.write(f"- At Risk: ${period_2.get('revenue_at_risk', 0):,.0f}")
+            st.markdown(period_summary(detailed.get('period_2', {})))
         
         # Insights
         insights = detailed.get('insights', [])
@@ -549,14 +676,188 @@ def show_comparison_results(comparison):
 # PAGE: DASHBOARD (Original)
 # ============================================================================
 
-@st.cache_data(ttl=300)
+def parquet_is_current():
+    """Whether the Parquet predictions exist and are not older than the CSV they were built from"""
+    if not PREDICTIONS_FILE.exists():
+        return False
+    if not PREDICTIONS_CSV_FILE.exists():
+        return True
+    return PREDICTIONS_FILE.stat().st_mtime >= PREDICTIONS_CSV_FILE.stat().st_mtime
+
+
+@st.cache_resource(ttl=300)
 def load_data():
-    """Load customer data from CSV"""
+    """Load customer data, preferring Parquet over CSV; the shared frame is read-only"""
     try:
-        df = pd.read_csv(PREDICTIONS_FILE)
-        return df
-    except Exception as e:
+        if parquet_is_current():
+            import pyarrow.parquet as pq
+            # Project only the columns present, as usecols does for the CSV
+            available = set(pq.read_schema(PREDICTIONS_FILE).names)
+            df = pd.read_parquet(
+                PREDICTIONS_FILE,
+                columns=[col for col in PREDICTION_COLUMNS if col in available]
+            )
+        else:
+            df = pd.read_csv(
+                PREDICTIONS_CSV_FILE,
+                engine="c",
+                usecols=lambda col: col in PREDICTION_COLUMNS,
+                dtype=PREDICTION_DTYPES
+            )
+    # OSError: missing or unreadable file; ParserError, EmptyDataError and ArrowInvalid subclass ValueError
+    except (OSError, ValueError):
         return None
+    # float32 halves the bytes scanned by the KPI reductions; category makes counts integer ops.
+    # Typed reads (CSV dtype=, Parquet from build_parquet_files) need no cast and no copy here.
+    mismatched = {
+        col: dtype for col, dtype in PREDICTION_DTYPES.items()
+        if col in df.columns and df[col].dtype != dtype
+    }
+    if mismatched:
+        df = df.astype(mismatched)
+    # Stamp each load so helpers taking the frame can key their cache on it (see frame_load_id)
+    df.attrs["load_id"] = time.time_ns()
+    return df
+
+
+def frame_load_id(df):
+    """Cache key for frames returned by load_data, instead of hashing every row"""
+    return df.attrs["load_id"]
+
+
+def compute_risk_codes(prob):
+    """Index into RISK_LABELS of each churn probability's risk level"""
+    # Compare in float32, the dtype load_data stores probabilities in, so 0.3 lands on its bin edge
+    return np.digitize(np.asarray(prob, dtype=np.float32), RISK_BINS)
+
+
+@st.cache_data(ttl=300)
+def compute_kpis(prob, charges):
+    """Compute dashboard KPI values and risk level counts from one bucketing pass"""
+    # np.digitize would put NaN probabilities in the Critical bucket, so leave them out
+    known = ~np.isnan(prob)
+    codes = compute_risk_codes(prob[known])
+    counts = np.bincount(codes, minlength=len(RISK_LABELS))
+    revenue = np.bincount(codes, weights=np.nan_to_num(charges[known]), minlength=len(RISK_LABELS))
+    # Codes 2 and 3 are High (>= 0.5) and Critical (>= 0.7)
+    return {
+        'high_risk': int(counts[3]),
+        'critical_risk': int(counts[2:].sum()),
+        'revenue_at_risk': float(revenue[2:].sum()),
+        'churn_rate': float(np.nanmean(prob) * 100),
+        'risk_counts': pd.Series(counts, index=RISK_LABELS)
+    }
+
+
+def compute_segment(prob, charges, charge_median):
+    """Assign each customer a SEGMENT_LABELS code from churn risk and monthly charges"""
+    high_risk = (prob >= 0.5).astype(np.int8)
+    high_value = (charges >= charge_median).astype(np.int8)
+    return (high_risk << 1) | high_value
+
+
+@st.cache_data(ttl=300, hash_funcs={pd.DataFrame: frame_load_id})
+def dashboard_aggregates(df):
+    """Precompute the small count series behind the dashboard charts"""
+    aggregates = {'contract': None, 'segment': None}
+    if 'Contract' in df.columns:
+        # Contract is categorical (see PREDICTION_DTYPES), so count its integer codes directly
+        contract = df['Contract'].cat
+        codes = contract.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(contract.categories))
+        observed = counts > 0
+        aggregates['contract'] = pd.Series(counts[observed], index=contract.categories[observed])
+    if 'Churn_Probability' in df.columns:
+        prob = df['Churn_Probability'].to_numpy()
+        if 'MonthlyCharges' in df.columns:
+            charges = df['MonthlyCharges'].to_numpy()
+            # Segment only customers with both values, as compute_kpis does for missing probabilities
+            known = ~(np.isnan(prob) | np.isnan(charges))
+            prob, charges = prob[known], charges[known]
+            codes = compute_segment(prob, charges, float(np.median(charges)) if len(charges) else 0.0)
+            aggregates['segment'] = pd.Series(
+                np.bincount(codes, minlength=len(SEGMENT_LABELS)), index=SEGMENT_LABELS
+            )
+    return aggregates
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def make_risk_pie(levels, counts):
+    """Build the risk distribution donut chart"""
+    import plotly.express as px
+    fig = px.pie(
+        values=list(counts),
+        names=list(levels),
+        color=list(levels),
+        color_discrete_map={
+            'Low': '#2ecc71', 'Medium': '#f1c40f',
+            'High': '#f39c12', 'Critical': '#e74c3c'
+        },
+        hole=0.4
+    )
+    fig.update_layout(margin=dict(t=20, b=20, l=20, r=20))
+    return fig
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def make_contract_bar(contracts, counts):
+    """Build the customers-per-contract bar chart"""
+    palette = ['#3498db', '#2ecc71', '#9b59b6']
+    fig = go.Figure(go.Bar(
+        x=list(contracts), y=list(counts),
+        marker_color=[palette[i % len(palette)] for i in range(len(contracts))]
+    ))
+    fig.update_layout(
+        margin=dict(t=20, b=20, l=20, r=20),
+        xaxis_title='Contract',
+        yaxis_title='Count',
+        showlegend=False
+    )
+    return fig
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def make_segment_bar(segments, counts):
+    """Build the customer segment horizontal bar chart"""
+    fig = go.Figure(go.Bar(
+        x=list(counts), y=list(segments), orientation='h',
+        marker_color=['#2ecc71', '#3498db', '#f39c12', '#e74c3c']
+    ))
+    fig.update_layout(
+        margin=dict(t=20, b=20, l=20, r=20),
+        xaxis_title='Customers',
+        showlegend=False
+    )
+    return fig
+
+
+@st.cache_data(ttl=300)
+def churn_histogram(prob, bins=30):
+    """Bin churn probabilities into equal-width buckets over [0, 1]"""
+    counts, _ = np.histogram(prob, bins=bins, range=(0, 1))
+    return tuple(counts.tolist())
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+def make_churn_histogram(counts):
+    """Build the churn probability histogram from pre-binned counts"""
+    width = 1 / len(counts)
+    centers = (np.arange(len(counts)) + 0.5) * width
+    fig = go.Figure(go.Bar(x=centers, y=counts, width=width, marker_color='#3498db'))
+    fig.update_layout(
+        margin=dict(t=20, b=20, l=20, r=20),
+        xaxis_title='Churn Probability',
+        yaxis_title='Customers',
+        bargap=0
+    )
+    return fig
+
+
+def build_parquet_files():
+    """Convert the predictions CSV to Parquet so the dashboard skips CSV parsing"""
+    df = pd.read_csv(PREDICTIONS_CSV_FILE, dtype=PREDICTION_DTYPES)
+    df.to_parquet(PREDICTIONS_FILE, index=False, compression="zstd")
+    print(f"Wrote {PREDICTIONS_FILE}")
 
 
 def show_dashboard_page():
@@ -567,70 +868,69 @@ def show_dashboard_page():
     
     if data is not None:
         # KPI Metrics Row
-        col1, col2, col3, col4 = st.columns(4)
-        
         total_customers = len(data)
         
         if 'Churn_Probability' in data.columns:
-            high_risk = (data['Churn_Probability'] >= 0.7).sum()
-            critical_risk = (data['Churn_Probability'] >= 0.5).sum()
-            revenue_at_risk = data[data['Churn_Probability'] >= 0.5]['MonthlyCharges'].sum()
-            churn_rate = data['Churn_Probability'].mean() * 100
+            # A projected read may lack MonthlyCharges; missing charges count as no revenue at risk
+            charges = (
+                data['MonthlyCharges'].to_numpy() if 'MonthlyCharges' in data.columns
+                else np.full(len(data), np.nan, dtype=np.float32)
+            )
+            kpis = compute_kpis(data['Churn_Probability'].to_numpy(), charges)
+            high_risk = kpis['high_risk']
+            critical_risk = kpis['critical_risk']
+            revenue_at_risk = kpis['revenue_at_risk']
+            churn_rate = kpis['churn_rate']
         else:
             high_risk = int(total_customers * 0.15)
             critical_risk = int(total_customers * 0.25)
             revenue_at_risk = 211661
             churn_rate = 26.5
         
-        with col1:
-            st.metric("Total Customers", f"{total_customers:,}")
-        with col2:
-            st.metric("Avg Churn Risk", f"{churn_rate:.1f}%")
-        with col3:
-            st.metric("High Risk Customers", f"{high_risk:,}")
-        with col4:
-            st.metric("Monthly Revenue at Risk", f"${revenue_at_risk:,.0f}")
+        kpi_grid([
+            ("Total Customers", f"{total_customers:,}"),
+            ("Avg Churn Risk", f"{churn_rate:.1f}%"),
+            ("High Risk Customers", f"{high_risk:,}"),
+            ("Monthly Revenue at Risk", f"${revenue_at_risk:,.0f}"),
+        ])
         
         st.markdown("---")
         
         # Charts Row
         col1, col2 = st.columns(2)
+        aggregates = dashboard_aggregates(data)
         
         with col1:
             st.subheader("📊 Risk Distribution")
             if 'Churn_Probability' in data.columns:
-                data['Risk_Level'] = pd.cut(
-                    data['Churn_Probability'],
-                    bins=[0, 0.3, 0.5, 0.7, 1.0],
-                    labels=['Low', 'Medium', 'High', 'Critical']
-                )
-                risk_counts = data['Risk_Level'].value_counts().reindex(['Low', 'Medium', 'High', 'Critical'])
+                risk_counts = kpis['risk_counts']
             else:
                 risk_counts = pd.Series({'Low': 3500, 'Medium': 1800, 'High': 1200, 'Critical': 543})
             
-            fig_risk = px.pie(
-                values=risk_counts.values,
-                names=risk_counts.index,
-                color=risk_counts.index,
-                color_discrete_map={
-                    'Low': '#2ecc71', 'Medium': '#f1c40f',
-                    'High': '#f39c12', 'Critical': '#e74c3c'
-                },
-                hole=0.4
-            )
-            fig_risk.update_layout(margin=dict(t=20, b=20, l=20, r=20))
+            fig_risk = make_risk_pie(tuple(risk_counts.index), tuple(risk_counts.tolist()))
             st.plotly_chart(fig_risk, use_container_width=True)
         
         with col2:
             st.subheader("📈 Churn by Contract Type")
-            if 'Contract' in data.columns:
-                contract_counts = data.groupby('Contract').size().reset_index(name='Count')
-                fig_contract = px.bar(
-                    contract_counts, x='Contract', y='Count', color='Contract',
-                    color_discrete_sequence=['#3498db', '#2ecc71', '#9b59b6']
-                )
-                fig_contract.update_layout(margin=dict(t=20, b=20, l=20, r=20), showlegend=False)
+            if aggregates['contract'] is not None:
+                contract_counts = aggregates['contract']
+                fig_contract = make_contract_bar(tuple(contract_counts.index), tuple(contract_counts.tolist()))
                 st.plotly_chart(fig_contract, use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if aggregates['segment'] is not None:
+                st.subheader("👥 Customer Segments")
+                segment_counts = aggregates['segment']
+                fig_segment = make_segment_bar(tuple(segment_counts.index), tuple(segment_counts.tolist()))
+                st.plotly_chart(fig_segment, use_container_width=True)
+        
+        with col2:
+            if 'Churn_Probability' in data.columns:
+                st.subheader("📉 Churn Distribution")
+                fig_hist = make_churn_histogram(churn_histogram(data['Churn_Probability'].to_numpy()))
+                st.plotly_chart(fig_hist, use_container_width=True)
     else:
         st.warning("📊 No local data available. Upload a dataset to get started!")
 
@@ -683,6 +983,41 @@ def main():
 # PAGE: QUICK PREDICT (Single Customer)
 # ============================================================================
 
+def heuristic_churn_probability(contract, tenure, internet, payment):
+    """Rule-based churn probability; accepts scalars or arrays of customers"""
+    contract, tenure, internet, payment = map(np.asarray, (contract, tenure, internet, payment))
+    return np.minimum(
+        0.2
+        + 0.3 * (contract == "Month-to-month")
+        + 0.2 * (tenure < 12)
+        + 0.1 * (internet == "Fiber optic")
+        + 0.1 * (payment == "Electronic check"),
+        0.95
+    )
+
+
+@st.cache_resource
+def make_gauge(prob):
+    """Build the churn probability gauge"""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=prob * 100,
+        title={'text': "Churn Probability %"},
+        gauge={
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "#e74c3c" if prob >= 0.7 else "#f39c12" if prob >= 0.5 else "#2ecc71"},
+            'steps': [
+                {'range': [0, 30], 'color': "#d5f5e3"},
+                {'range': [30, 50], 'color': "#fcf3cf"},
+                {'range': [50, 70], 'color': "#fdebd0"},
+                {'range': [70, 100], 'color': "#fadbd8"}
+            ]
+        }
+    ))
+    fig.update_layout(height=250, margin=dict(t=50, b=20))
+    return fig
+
+
 def show_quick_predict_page():
     """Show quick prediction form for single customer"""
     st.markdown('<h1 class="main-header">🔮 Quick Churn Prediction</h1>', unsafe_allow_html=True)
@@ -713,18 +1048,9 @@ def show_quick_predict_page():
     
     if st.button("🔮 Predict Churn", type="primary", use_container_width=True):
         # Calculate prediction using heuristics
-        prob = 0.2
-        if contract == "Month-to-month":
-            prob += 0.3
-        if tenure < 12:
-            prob += 0.2
-        if internet == "Fiber optic":
-            prob += 0.1
-        if payment == "Electronic check":
-            prob += 0.1
-        prob = min(prob, 0.95)
-        
-        risk = "Critical" if prob >= 0.7 else "High" if prob >= 0.5 else "Medium" if prob >= 0.3 else "Low"
+        prob = float(heuristic_churn_probability(contract, tenure, internet, payment))
+        
+        risk = RISK_LABELS[compute_risk_codes(prob)]
         
         st.markdown("---")
         st.subheader("📊 Prediction Results")
@@ -732,22 +1058,7 @@ def show_quick_predict_page():
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            fig = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=prob * 100,
-                title={'text': "Churn Probability %"},
-                gauge={
-                    'axis': {'range': [0, 100]},
-                    'bar': {'color': "#e74c3c" if prob >= 0.7 else "#f39c12" if prob >= 0.5 else "#2ecc71"},
-                    'steps': [
-                        {'range': [0, 30], 'color': "#d5f5e3"},
-                        {'range': [30, 50], 'color': "#fcf3cf"},
-                        {'range': [50, 70], 'color': "#fdebd0"},
-                        {'range': [70, 100], 'color': "#fadbd8"}
-                    ]
-                }
-            ))
-            fig.update_layout(height=250, margin=dict(t=50, b=20))
+            fig = make_gauge(round(prob, 2))
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
@@ -771,4 +1082,7 @@ def show_quick_predict_page():
 
 # Run the app
 if __name__ == "__main__":
-    main()
+    if "--build-parquet" in sys.argv[1:]:
+        build_parquet_files()
+    else:
+        main()